@@ -0,0 +1,33 @@
+"""add users active role id index
+
+Revision ID: 46679938cf98
+Revises: 3f1c2a9d0b7e
+Create Date: 2026-10-14 12:50:19.399849+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '46679938cf98'
+down_revision: Union[str, None] = '3f1c2a9d0b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases that create_all built after the model change already have the index
+    op.create_index(
+        "ix_users_active_role_id",
+        "users",
+        ["active", "role", "id"],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_active_role_id", table_name="users", if_exists=True)
+
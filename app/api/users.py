@@ -1,17 +1,72 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+from sqlalchemy import exists, func, lambda_stmt, select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
+import base64
+import binascii
 import logging
 
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserListResponse
-from app.core.exceptions import UserNotFoundException, UserAlreadyExistsException
+from app.core.cache import UserCache, get_user_cache, user_cache_key
+from app.core.exceptions import UserNotFoundException, UserAlreadyExistsException, ValidationException
 
 router = APIRouter(prefix="/users", tags=["users"])
 logger = logging.getLogger(__name__)
 
+_USERS_ADAPTER = TypeAdapter(List[UserResponse])
+
+
+def _encode_cursor(user_id: int) -> str:
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode()
+
+
+# Ids are 32-bit integer columns, larger values would overflow the driver's parameter binding
+_MAX_USER_ID = 2**31 - 1
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        user_id = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, binascii.Error):
+        raise ValidationException(detail="Invalid pagination cursor")
+    if not 0 <= user_id <= _MAX_USER_ID:
+        raise ValidationException(detail="Invalid pagination cursor")
+    return user_id
+
+
+async def _ensure_unique(db: AsyncSession, username: Optional[str] = None, email: Optional[str] = None) -> None:
+    checks = []
+    if username is not None:
+        checks.append(("username", username, exists().where(User.username == username)))
+    if email is not None:
+        checks.append(("email", email, exists().where(User.email == email)))
+    if not checks:
+        return
+    
+    result = await db.execute(select(*(check.label(field) for field, _, check in checks)))
+    for (field, value, _), taken in zip(checks, result.one()):
+        if taken:
+            raise UserAlreadyExistsException(field=field, value=value)
+
+
+def _filter_users(
+    stmt: StatementLambdaElement,
+    active: Optional[bool],
+    role: Optional[str]
+) -> StatementLambdaElement:
+    if active is not None:
+        stmt += lambda s: s.where(User.active == active)
+    if role:
+        stmt += lambda s: s.where(User.role == role)
+    return stmt
+
 
 @router.post(
     "/",
@@ -20,31 +75,24 @@ logger = logging.getLogger(__name__)
     summary="Create a new user",
     description="Create a new user with the provided information. Username and email must be unique."
 )
-def create_user(user: UserCreate, db: Session = Depends(get_db)) -> UserResponse:
-    existing_user = db.query(User).filter(User.username == user.username).first()
-    if existing_user:
-        raise UserAlreadyExistsException(field="username", value=user.username)
-    
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise UserAlreadyExistsException(field="email", value=user.email)
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)) -> UserResponse:
+    await _ensure_unique(db, username=user.username, email=user.email)
     
     db_user = User(**user.model_dump())
     
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
         return db_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error creating user: {user.username}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User creation failed due to data constraint violation"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating user: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -55,32 +103,56 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)) -> UserResponse
 @router.get(
     "/",
     response_model=UserListResponse,
+    response_class=ORJSONResponse,
     summary="Get all users",
-    description="Retrieve a paginated list of all users with optional filtering."
+    description=(
+        "Retrieve a paginated list of all users with optional filtering. "
+        "Pass the returned next_cursor to fetch the following page."
+    )
 )
-def get_users(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+async def get_users(
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Number of records to skip (ignored when cursor is set)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     active: bool = Query(None, description="Filter by active status"),
     role: str = Query(None, description="Filter by role"),
-    db: Session = Depends(get_db)
-) -> UserListResponse:
-    query = db.query(User)
+    with_total: bool = Query(False, description="Include the total number of matching users"),
+    db: AsyncSession = Depends(get_db)
+) -> ORJSONResponse:
+    total = None
+    if with_total:
+        count_query = _filter_users(lambda_stmt(lambda: select(func.count()).select_from(User)), active, role)
+        total = await db.scalar(count_query)
     
-    if active is not None:
-        query = query.filter(User.active == active)
-    if role:
-        query = query.filter(User.role == role)
+    query = _filter_users(lambda_stmt(lambda: select(User).options(raiseload("*"))), active, role)
     
-    total = query.count()
-    users = query.offset(skip).limit(limit).all()
+    if cursor:
+        last_id = _decode_cursor(cursor)
+        query += lambda s: s.where(User.id > last_id)
+    elif skip:
+        query += lambda s: s.offset(skip)
     
-    return UserListResponse(
-        total=total,
-        users=users,
-        skip=skip,
-        limit=limit
-    )
+    page_size = limit + 1
+    query += lambda s: s.order_by(User.id.asc()).limit(page_size)
+    result = await db.scalars(query)
+    users = result.all()
+    has_next = len(users) > limit
+    users = users[:limit]
+    next_cursor = _encode_cursor(users[-1].id) if has_next else None
+    
+    # FastAPI would re-validate every row against response_model (kept for the OpenAPI schema),
+    # so return the already serialized page instead
+    return ORJSONResponse({
+        "total": total,
+        "users": _USERS_ADAPTER.dump_python(
+            _USERS_ADAPTER.validate_python(users, from_attributes=True),
+            mode="json"
+        ),
+        "skip": skip,
+        "limit": limit,
+        "has_next": has_next,
+        "next_cursor": next_cursor
+    })
 
 
 @router.get(
@@ -89,13 +161,24 @@ def get_users(
     summary="Get user by ID",
     description="Retrieve a specific user by their unique identifier."
 )
-def get_user(user_id: int, db: Session = Depends(get_db)) -> UserResponse:
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    cache: UserCache = Depends(get_user_cache)
+) -> UserResponse:
+    cached = await cache.get(user_cache_key(user_id))
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    user = await db.get(User, user_id)
     
     if not user:
         raise UserNotFoundException(user_id=user_id)
     
-    return user
+    payload = UserResponse.model_validate(user).model_dump_json().encode()
+    # add never overwrites, so a write that committed after the read above keeps its tombstone
+    await cache.add(user_cache_key(user_id), payload)
+    return Response(content=payload, media_type="application/json")
 
 
 @router.put(
@@ -104,43 +187,40 @@ def get_user(user_id: int, db: Session = Depends(get_db)) -> UserResponse:
     summary="Update user",
     description="Update an existing user's information. Only provided fields will be updated."
 )
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: UserCache = Depends(get_user_cache)
 ) -> UserResponse:
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise UserNotFoundException(user_id=user_id)
     
     update_data = user_update.model_dump(exclude_unset=True)
     
-    if "username" in update_data and update_data["username"] != db_user.username:
-        existing = db.query(User).filter(User.username == update_data["username"]).first()
-        if existing:
-            raise UserAlreadyExistsException(field="username", value=update_data["username"])
-    
-    if "email" in update_data and update_data["email"] != db_user.email:
-        existing = db.query(User).filter(User.email == update_data["email"]).first()
-        if existing:
-            raise UserAlreadyExistsException(field="email", value=update_data["email"])
+    await _ensure_unique(
+        db,
+        username=update_data.get("username") if update_data.get("username") != db_user.username else None,
+        email=update_data.get("email") if update_data.get("email") != db_user.email else None
+    )
     
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     try:
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await cache.invalidate(user_cache_key(user_id))
         return db_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error updating user {user_id}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User update failed due to data constraint violation"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating user {user_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -154,17 +234,22 @@ def update_user(
     summary="Delete user",
     description="Delete a user from the system permanently."
 )
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    cache: UserCache = Depends(get_user_cache)
+):
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise UserNotFoundException(user_id=user_id)
     
     try:
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        await cache.invalidate(user_cache_key(user_id))
         return None
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting user {user_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
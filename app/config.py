@@ -1,7 +1,7 @@
+from functools import lru_cache
 from typing import List
-from pydantic_settings import BaseSettings
-from pydantic import Field, validator
-import os
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, field_validator
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,20 @@ class Settings(BaseSettings):
     )
     database_pool_size: int = Field(default=5, env="DATABASE_POOL_SIZE")
     database_max_overflow: int = Field(default=10, env="DATABASE_MAX_OVERFLOW")
+    database_pool_recycle: int = Field(default=1800, env="DATABASE_POOL_RECYCLE")
+    database_pool_timeout: int = Field(default=30, env="DATABASE_POOL_TIMEOUT")
+    database_statement_cache_size: int = Field(default=256, env="DATABASE_STATEMENT_CACHE_SIZE")
+    # Set to false in production once deploys run `alembic upgrade head` before starting the app
+    auto_create_schema: bool = Field(default=True, env="AUTO_CREATE_SCHEMA")
+    
+    # Caching is off unless set: a redis:// URL shares it between workers, memory:// is per-process
+    cache_url: str = Field(default="", env="CACHE_URL")
+    user_cache_ttl: int = Field(default=300, env="USER_CACHE_TTL")
+    user_cache_max_size: int = Field(default=1024, env="USER_CACHE_MAX_SIZE")
+    # How long a write blocks re-caching the user, covering reads that were in flight during it
+    user_cache_invalidation_ttl: int = Field(default=10, env="USER_CACHE_INVALIDATION_TTL")
+    cache_connect_timeout: float = Field(default=0.5, env="CACHE_CONNECT_TIMEOUT")
+    cache_socket_timeout: float = Field(default=0.25, env="CACHE_SOCKET_TIMEOUT")
     
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:8000"],
@@ -29,24 +43,26 @@ class Settings(BaseSettings):
     gcp_project_id: str = Field(default="", env="GCP_PROJECT_ID")
     gcp_region: str = Field(default="us-central1", env="GCP_REGION")
     
-    @validator("environment")
+    @field_validator("environment", mode="after")
+    @classmethod
     def validate_environment(cls, v):
         allowed = ["development", "testing", "production"]
         if v not in allowed:
             raise ValueError(f"Environment must be one of {allowed}")
         return v
     
-    @validator("log_level")
+    @field_validator("log_level", mode="after")
+    @classmethod
     def validate_log_level(cls, v):
         allowed = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
         if v.upper() not in allowed:
             raise ValueError(f"Log level must be one of {allowed}")
         return v.upper()
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
 
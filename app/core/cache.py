@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+import logging
+import time
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Written on invalidation so a reader that loaded the row before the write cannot add it back
+TOMBSTONE = b""
+
+
+def user_cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class NullCache:
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def add(self, key: str, value: bytes) -> None:
+        pass
+
+    async def invalidate(self, key: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCache:
+    def __init__(self, ttl: int, max_size: int, invalidation_ttl: int = 10):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.invalidation_ttl = invalidation_ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def _store(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._live(key)
+        if not value:
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def add(self, key: str, value: bytes) -> None:
+        # Only fills an empty slot, never overwrites a newer entry or a tombstone
+        if self._live(key) is None:
+            self._store(key, value, self.ttl)
+
+    async def invalidate(self, key: str) -> None:
+        self._store(key, TOMBSTONE, self.invalidation_ttl)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisCache:
+    def __init__(
+        self,
+        url: str,
+        ttl: int,
+        invalidation_ttl: int = 10,
+        connect_timeout: float = 0.5,
+        socket_timeout: float = 0.25
+    ):
+        self.ttl = ttl
+        self.invalidation_ttl = invalidation_ttl
+        self._client = redis.from_url(
+            url,
+            socket_connect_timeout=connect_timeout,
+            socket_timeout=socket_timeout
+        )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self._client.get(key)
+        except RedisError as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+        return value or None
+
+    async def add(self, key: str, value: bytes) -> None:
+        try:
+            await self._client.set(key, value, ex=self.ttl, nx=True)
+        except RedisError as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+
+    async def invalidate(self, key: str) -> None:
+        try:
+            await self._client.set(key, TOMBSTONE, ex=self.invalidation_ttl)
+        except RedisError as e:
+            logger.error(f"Cache invalidation failed for {key}: {e}")
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+UserCache = Union[NullCache, MemoryCache, RedisCache]
+
+
+@lru_cache(maxsize=1)
+def get_user_cache() -> UserCache:
+    settings = get_settings()
+    if not settings.cache_url:
+        return NullCache()
+    if settings.cache_url == "memory://":
+        return MemoryCache(
+            ttl=settings.user_cache_ttl,
+            max_size=settings.user_cache_max_size,
+            invalidation_ttl=settings.user_cache_invalidation_ttl
+        )
+    return RedisCache(
+        settings.cache_url,
+        ttl=settings.user_cache_ttl,
+        invalidation_ttl=settings.user_cache_invalidation_ttl,
+        connect_timeout=settings.cache_connect_timeout,
+        socket_timeout=settings.cache_socket_timeout
+    )
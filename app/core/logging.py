@@ -1,19 +1,26 @@
 import logging
 import sys
+import orjson
 from pythonjsonlogger import jsonlogger
-from app.config import settings
+from app.config import get_settings
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
     def add_fields(self, log_record, record, message_dict):
         super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
+        settings = get_settings()
         log_record['level'] = record.levelname
         log_record['logger'] = record.name
         log_record['environment'] = settings.environment
         log_record['app_name'] = settings.app_name
+        log_record['timestamp'] = record.created
+    
+    def jsonify_log_record(self, log_record):
+        return orjson.dumps(log_record, default=str).decode()
 
 
 def setup_logging():
+    settings = get_settings()
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, settings.log_level))
     
@@ -37,6 +44,11 @@ def setup_logging():
     console_handler.setFormatter(formatter)
     root_logger.addHandler(console_handler)
     
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    
     root_logger.info(
         f"Logging configured for {settings.app_name} "
         f"in {settings.environment} environment with level {settings.log_level}"
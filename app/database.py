@@ -1,41 +1,63 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from app.config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ASYNC_DRIVERS = {
+    "postgresql://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return url.replace(prefix, async_prefix, 1)
+    return url
+
+
+async_database_url = get_async_database_url(settings.database_url)
 
 engine_kwargs = {}
-if settings.database_url.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
-else:
+if not async_database_url.startswith("sqlite"):
     engine_kwargs["pool_size"] = settings.database_pool_size
     engine_kwargs["max_overflow"] = settings.database_max_overflow
-
-engine = create_engine(
-    settings.database_url,
+    engine_kwargs["pool_pre_ping"] = True
+    engine_kwargs["pool_recycle"] = settings.database_pool_recycle
+    engine_kwargs["pool_timeout"] = settings.database_pool_timeout
+if async_database_url.startswith("postgresql+asyncpg"):
+    engine_kwargs["connect_args"] = {
+        "prepared_statement_cache_size": settings.database_statement_cache_size,
+        "statement_cache_size": settings.database_statement_cache_size,
+    }
+
+engine = create_async_engine(
+    async_database_url,
     echo=settings.debug,
     **engine_kwargs
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
+async def init_db():
+    if not settings.auto_create_schema:
+        logger.info("Schema auto-creation disabled, skipping create_all")
+        return
+    
     try:
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
         raise
-
@@ -1,16 +1,20 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
-import time
 import logging
+import orjson
 
-from app.config import settings
-from app.database import init_db
+from app.config import get_settings
+from app.database import engine, init_db
+from app.core.cache import get_user_cache
 from app.core.logging import setup_logging
+from app.core.middleware import ProcessTimeMiddleware
 from app.api.users import router as users_router
 
+settings = get_settings()
 setup_logging()
 logger = logging.getLogger(__name__)
 
@@ -18,13 +22,16 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        init_db()
+        await init_db()
         logger.info(f"{settings.app_name} started - Environment: {settings.environment}")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
     
     yield
+    
+    await get_user_cache().close()
+    await engine.dispose()
 
 
 app = FastAPI(
@@ -35,25 +42,27 @@ app = FastAPI(
     redoc_url="/redoc",
     openapi_url="/openapi.json",
     lifespan=lifespan,
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
+app.add_middleware(ProcessTimeMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
-            "errors": exc.errors()
+            "errors": jsonable_encoder(exc.errors())
         }
     )
 
@@ -61,7 +70,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unexpected error: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "detail": "Internal server error",
@@ -70,37 +79,29 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    
-    if response.status_code >= 400:
-        logger.warning(f"{request.method} {request.url.path} - Status: {response.status_code}")
-    
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+_HEALTH_BYTES = orjson.dumps({
+    "status": "healthy",
+    "app_name": settings.app_name,
+    "version": settings.app_version,
+    "environment": settings.environment
+})
+
+_ROOT_BYTES = orjson.dumps({
+    "message": f"Welcome to {settings.app_name}",
+    "version": settings.app_version,
+    "docs": "/docs",
+    "health": "/health"
+})
 
 
 @app.get("/health", tags=["health"], summary="Health check")
-def health_check():
-    return {
-        "status": "healthy",
-        "app_name": settings.app_name,
-        "version": settings.app_version,
-        "environment": settings.environment
-    }
+async def health_check():
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 
 @app.get("/", tags=["root"], summary="Root endpoint")
-def root():
-    return {
-        "message": f"Welcome to {settings.app_name}",
-        "version": settings.app_version,
-        "docs": "/docs",
-        "health": "/health"
-    }
+async def root():
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 app.include_router(users_router, prefix=settings.api_v1_prefix)
@@ -98,10 +98,12 @@ class UserResponse(UserBase):
 
 
 class UserListResponse(BaseModel):
-    total: int = Field(..., description="Total number of users")
+    total: Optional[int] = Field(default=None, description="Total number of users, only set when with_total=true")
     users: List[UserResponse] = Field(..., description="List of users")
     skip: int = Field(default=0, description="Number of records skipped")
     limit: int = Field(default=100, description="Maximum number of records returned")
+    has_next: bool = Field(default=False, description="Whether more users are available")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor to fetch the next page, if any")
     
     class Config:
         json_schema_extra = {
@@ -121,7 +123,9 @@ class UserListResponse(BaseModel):
                     }
                 ],
                 "skip": 0,
-                "limit": 10
+                "limit": 10,
+                "has_next": True,
+                "next_cursor": "MQ=="
             }
         }
 
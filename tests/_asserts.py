@@ -0,0 +1,2 @@
+def assert_status(response, expected: int):
+    assert response.status_code == expected, response.text
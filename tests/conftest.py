@@ -1,93 +1,160 @@
+import asyncio
+import os
+from types import MappingProxyType
+
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+
+# Must run before the helper module is first imported so its asserts keep pytest's diffs
+pytest.register_assert_rewrite("tests._asserts")
+
+# The app engine is overridden below, so keep the lifespan from creating its schema
+os.environ.setdefault("AUTO_CREATE_SCHEMA", "false")
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
-from app.main import app
+from app.main import app as application
 from app.database import Base, get_db
+from app.core.cache import MemoryCache, get_user_cache
 from app.models.user import User
+from app.schemas.user import UserResponse
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-engine = create_engine(
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@event.listens_for(engine.sync_engine, "connect")
+def disable_driver_transactions(dbapi_connection, connection_record):
+    # pysqlite's implicit BEGIN breaks SAVEPOINT nesting, so let SQLAlchemy emit it instead
+    dbapi_connection.isolation_level = None
 
-@pytest.fixture(scope="function")
-def db_session():
-    session = TestingSessionLocal()
-    
-    try:
-        yield session
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
 
+@event.listens_for(engine.sync_engine, "begin")
+def emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
 
-@pytest.fixture(scope="function")
-def client(db_session):
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+
+# Sessions join the per-test transaction and only commit to a SAVEPOINT inside it
+TestingSessionLocal = async_sessionmaker(
+    bind=engine,
+    autoflush=False,
+    expire_on_commit=False,
+    join_transaction_mode="create_savepoint"
+)
+
+
+user_cache = MemoryCache(ttl=300, max_size=1024)
+
+
+async def create_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def close_session(http_client: AsyncClient):
+    await http_client.aclose()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def app():
+    async def override_get_db():
+        async with TestingSessionLocal() as session:
+            yield session
     
-    app.dependency_overrides[get_db] = override_get_db
+    application.dependency_overrides[get_db] = override_get_db
+    application.dependency_overrides[get_user_cache] = lambda: user_cache
+    yield application
+    application.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    # The StaticPool connection outlives this loop; aiosqlite resolves results on the caller's loop
+    asyncio.run(create_schema())
     
-    with TestClient(app) as test_client:
-        yield test_client
+    http_client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    yield http_client
     
-    app.dependency_overrides.clear()
+    asyncio.run(close_session(http_client))
+
+
+@pytest.fixture
+async def db_connection(client):
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        TestingSessionLocal.configure(bind=connection)
+        try:
+            yield connection
+        finally:
+            await transaction.rollback()
+            TestingSessionLocal.configure(bind=engine)
+            await user_cache.close()
+
+
+@pytest.fixture
+async def db_session(db_connection):
+    async with TestingSessionLocal() as session:
+        yield session
 
 
 @pytest.fixture
+def cache(db_connection):
+    return user_cache
+
+
+@pytest.fixture(scope="module")
 def sample_user_data():
-    return {
+    return MappingProxyType({
         "username": "john_doe",
         "email": "john.doe@example.com",
         "first_name": "John",
         "last_name": "Doe",
         "role": "user",
         "active": True
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
+def sample_user_body(sample_user_data):
+    return orjson.dumps(dict(sample_user_data))
+
+
+@pytest.fixture(scope="module")
 def sample_user_data_2():
-    return {
+    return MappingProxyType({
         "username": "jane_smith",
         "email": "jane.smith@example.com",
         "first_name": "Jane",
         "last_name": "Smith",
         "role": "admin",
         "active": True
-    }
+    })
 
 
 @pytest.fixture
-def created_user(client, sample_user_data):
-    response = client.post("/api/v1/users/", json=sample_user_data)
-    assert response.status_code == 201
-    return response.json()
+async def created_user(db_session, sample_user_data):
+    user = User(**sample_user_data)
+    db_session.add(user)
+    await db_session.commit()
+    
+    return UserResponse.model_validate(user).model_dump(mode="json")
 
 
 @pytest.fixture
-def multiple_users(client, sample_user_data, sample_user_data_2):
-    users = []
-    
-    response1 = client.post("/api/v1/users/", json=sample_user_data)
-    assert response1.status_code == 201
-    users.append(response1.json())
-    
-    response2 = client.post("/api/v1/users/", json=sample_user_data_2)
-    assert response2.status_code == 201
-    users.append(response2.json())
+async def multiple_users(db_session, sample_user_data, sample_user_data_2):
+    users = [User(**sample_user_data), User(**sample_user_data_2)]
+    db_session.add_all(users)
+    await db_session.commit()
     
-    return users
+    return [UserResponse.model_validate(user).model_dump(mode="json") for user in users]
 
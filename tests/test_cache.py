@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config import get_settings
+from app.core.cache import MemoryCache, NullCache, RedisCache, get_user_cache
+
+
+class FakeRedis:
+    # Just the subset of redis.asyncio.Redis that RedisCache calls; expiry is not simulated
+    def __init__(self):
+        self.data = {}
+    
+    async def get(self, key):
+        return self.data.get(key)
+    
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+    
+    async def aclose(self):
+        pass
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise RedisConnectionError("connection refused")
+    
+    async def set(self, key, value, ex=None, nx=False):
+        raise RedisConnectionError("connection refused")
+
+
+def redis_cache(client):
+    cache = RedisCache("redis://localhost:6379/0", ttl=300)
+    cache._client = client
+    return cache
+
+
+@pytest.fixture
+def cache_settings(monkeypatch):
+    def configure(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        get_settings.cache_clear()
+        get_user_cache.cache_clear()
+        return get_user_cache()
+    
+    yield configure
+    
+    monkeypatch.undo()
+    get_settings.cache_clear()
+    get_user_cache.cache_clear()
+
+
+class TestUserCacheFactory:
+    
+    def test_disabled_without_cache_url(self, cache_settings):
+        assert isinstance(cache_settings(CACHE_URL=""), NullCache)
+    
+    def test_memory_cache(self, cache_settings):
+        cache = cache_settings(CACHE_URL="memory://", USER_CACHE_TTL="60", USER_CACHE_MAX_SIZE="10")
+        
+        assert isinstance(cache, MemoryCache)
+        assert (cache.ttl, cache.max_size) == (60, 10)
+    
+    def test_redis_cache(self, cache_settings):
+        cache = cache_settings(
+            CACHE_URL="redis://localhost:6379/0",
+            CACHE_CONNECT_TIMEOUT="0.1",
+            CACHE_SOCKET_TIMEOUT="0.2"
+        )
+        
+        assert isinstance(cache, RedisCache)
+        connection_kwargs = cache._client.connection_pool.connection_kwargs
+        assert (connection_kwargs["socket_connect_timeout"], connection_kwargs["socket_timeout"]) == (0.1, 0.2)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "memory":
+        return MemoryCache(ttl=300, max_size=16)
+    return redis_cache(FakeRedis())
+
+
+class TestUserCache:
+    
+    async def test_add_fills_missing_key(self, cache):
+        await cache.add("user:1", b"fresh")
+        
+        assert await cache.get("user:1") == b"fresh"
+    
+    async def test_add_does_not_overwrite(self, cache):
+        await cache.add("user:1", b"fresh")
+        await cache.add("user:1", b"other")
+        
+        assert await cache.get("user:1") == b"fresh"
+    
+    async def test_tombstone_blocks_stale_add(self, cache):
+        await cache.add("user:1", b"old")
+        await cache.invalidate("user:1")
+        await cache.add("user:1", b"old")
+        
+        assert await cache.get("user:1") is None
+
+
+class TestRedisCacheFailures:
+    
+    async def test_errors_degrade_to_miss(self):
+        cache = redis_cache(BrokenRedis())
+        
+        await cache.add("user:1", b"fresh")
+        await cache.invalidate("user:1")
+        assert await cache.get("user:1") is None
+    
+    async def test_unresponsive_server_times_out(self):
+        # Accepts the connection but never replies, like a blackholed Redis
+        writers = []
+        server = await asyncio.start_server(lambda reader, writer: writers.append(writer), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = RedisCache(f"redis://127.0.0.1:{port}/0", ttl=300, socket_timeout=0.05)
+        
+        try:
+            assert await asyncio.wait_for(cache.get("user:1"), timeout=1) is None
+        finally:
+            await cache.close()
+            for writer in writers:
+                writer.close()
+            server.close()
+            await server.wait_closed()
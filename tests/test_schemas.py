@@ -0,0 +1,32 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.user import UserCreate, UserUpdate
+
+
+class TestUserSchema:
+    
+    @pytest.mark.parametrize("field,value", [
+        ("email", "not-an-email"),
+        ("username", "ab"),
+        ("username", "user@name!"),
+        ("role", "superuser"),
+        ("first_name", ""),
+        ("first_name", "   "),
+    ])
+    def test_user_create_invalid(self, sample_user_data, field, value):
+        with pytest.raises(ValidationError):
+            UserCreate(**{**sample_user_data, field: value})
+    
+    def test_user_create_missing_required_field(self):
+        with pytest.raises(ValidationError):
+            UserCreate(username="testuser", email="test@example.com")
+    
+    @pytest.mark.parametrize("field,value", [
+        ("email", "notamemail"),
+        ("username", "user@name!"),
+        ("last_name", "   "),
+    ])
+    def test_user_update_invalid(self, field, value):
+        with pytest.raises(ValidationError):
+            UserUpdate(**{field: value})